@@ -1,17 +1,86 @@
 import asyncio
+import atexit
 import json
 import logging
 import os
+import queue
+import struct
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
-from typing import Any, Dict, List, Final, Callable, Awaitable
+from typing import Any, Dict, List, Final, Optional, Tuple, Union
 
+import msgspec
 import websockets
+from sortedcontainers import SortedDict
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 
+# orjson is a C/Rust JSON codec, several times faster than stdlib json on the
+# per-frame decode path; fall back to stdlib json if it is not installed
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
 # Constants
 BASE_LOGS_DIR: Final[str] = "logs"
 BASE_DATA_DIR: Final[str] = "data"
 
+# DATA_STORE is fixed at process start, so read it once instead of per message
+DATA_STORE_ENABLED: Final[bool] = os.getenv("DATA_STORE", "False").lower() == "true"
+
+# DATA_STORE serialization: "json" keeps line-delimited JSON, "msgpack" writes
+# binary msgpack frames (length-prefixed), which encode faster and take less disk
+DATA_FORMAT: Final[str] = os.getenv("DATA_FORMAT", "json").lower()
+DATA_FILE_EXT: Final[str] = "msgpack" if DATA_FORMAT == "msgpack" else "json"
+
+# Output file buffering: 1 MB userspace buffer behind a bounded queue that a
+# background task drains in batches, so disk I/O never stalls the recv loop
+OUTPUT_BUFFER_SIZE: Final[int] = 1024 * 1024
+WRITE_QUEUE_MAX: Final[int] = 10_000
+WRITE_BATCH_MAX: Final[int] = 256
+
+# Reusable encoder so the internal buffer is allocated once
+_MSGPACK_ENCODER: Final[msgspec.msgpack.Encoder] = msgspec.msgpack.Encoder()
+
+# Directories already created in this process, so repeated client setups
+# (logs + data share the per-product folder) skip the makedirs stat
+_ENSURED_DIRS: set = set()
+
+
+class SubscriptionChannel(msgspec.Struct):
+    """One channel entry of a 'subscriptions' ack."""
+    name: str
+    product_ids: List[str]
+
+
+class SubscriptionsAck(msgspec.Struct, tag_field="type", tag="subscriptions"):
+    """Subscription confirmation sent by the server after 'subscribe'."""
+    channels: List[SubscriptionChannel]
+
+
+class Snapshot(msgspec.Struct, tag_field="type", tag="snapshot"):
+    """Full order book snapshot: (price, size) pairs per side."""
+    product_id: str
+    bids: List[Tuple[str, str]]
+    asks: List[Tuple[str, str]]
+
+
+class L2Update(msgspec.Struct, tag_field="type", tag="l2update"):
+    """Incremental order book update: (side, price, size) changes."""
+    product_id: str
+    changes: List[Tuple[str, str, str]]
+
+
+FeedMessage = Union[SubscriptionsAck, Snapshot, L2Update]
+
+# Typed decoder: fuses JSON parsing and structural validation in C, so the
+# per-message isinstance ladders of the former _*_check methods are not needed
+_FEED_DECODER: Final[msgspec.json.Decoder] = msgspec.json.Decoder(FeedMessage)
+
 COINBASE_WS_URL = "wss://ws-feed.exchange.coinbase.com"
 if os.getenv("USE_MOCKED_FEED", "False").lower() == "true":
     port = os.getenv("MOCK_PORT", "8765")
@@ -27,6 +96,16 @@ APP_START_TIMESTAMP: Final[str] = datetime.now().strftime("%Y-%m-%d-%H%M%S")
 # explored BTC to require larger than 1 Mb socket for subscription
 WEB_SOCKET_SIZE: Final[int] = 8 * 1024 * 1024  # 8 MB in bytes
 
+# Reconnect backoff: doubles on consecutive failures, resets after a
+# connection that made it through subscribe()
+RECONNECT_INITIAL_DELAY: Final[float] = 1.0
+RECONNECT_MAX_DELAY: Final[float] = 60.0
+
+# Burst coalescing: drain frames that are already buffered before recomputing
+# analytics, bounded so a sustained burst cannot starve the recompute
+COALESCE_MAX_BATCH: Final[int] = 64
+COALESCE_WAIT: Final[float] = 0.001  # seconds to wait for a follow-up frame
+
 class CoinbaseOrderBookClient:
     """
     A WebSocket client for subscribing to Coinbase's level2_50 order book channel for a single product_id.
@@ -37,16 +116,35 @@ class CoinbaseOrderBookClient:
         self.moving_average_period = moving_average_period
         self.date_format = "%Y-%m-%d"
 
+        # The subscription payload never changes, so serialize it once up front
+        self._subscription_bytes = _dumps(self.create_subscription_message())
+
         # File paths
         self.history_file = self._setup_file(BASE_LOGS_DIR, log_file=True)
-        self.output_file = self._setup_file(BASE_DATA_DIR) if os.getenv("DATA_STORE", "False").lower() == "true" else None
+        self.output_file = self._setup_file(BASE_DATA_DIR) if DATA_STORE_ENABLED else None
         self.logger = self._setup_logger()
 
-        # Order book data
-        self.bids: Dict[str, str] = {}
-        self.asks: Dict[str, str] = {}
+        # Keep the output file open for the client's lifetime: one buffered
+        # write per message instead of open/write/close syscalls
+        self._output_fp = None
+        self._write_queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_MAX)
+        self._writer_task: Optional[asyncio.Task] = None
+        if self.output_file:
+            self._output_fp = open(self.output_file, "ab", buffering=OUTPUT_BUFFER_SIZE)
+            atexit.register(self._output_fp.close)
+
+        # Order book data, keyed by float price so best bid/ask are O(log N) lookups
+        self.bids: SortedDict = SortedDict()
+        self.asks: SortedDict = SortedDict()
+        # Cached top-of-book, refreshed by _calculations
+        self._best_bid: Optional[float] = None
+        self._best_ask: Optional[float] = None
+        # The subscriptions ack only needs validating once per connection
+        self._subscription_acked = False
         self.max_spread = 0.0
-        self.mid_price_history: List[float] = []
+        # Fixed-size window plus running sum, so the moving average is O(1) per update
+        self.mid_price_history: deque = deque(maxlen=moving_average_period)
+        self._mid_price_sum = 0.0
         logging.info(f"{self.product_id} setup DONE.")
 
     def _setup_file(self, base_folder: str, log_file: bool = False) -> str:
@@ -54,14 +152,30 @@ class CoinbaseOrderBookClient:
         Create a folder structure based on product_id and date, and return the file path.
         """
         folder_path = os.path.join(base_folder, self.product_id)
-        os.makedirs(folder_path, exist_ok=True)
+        if folder_path not in _ENSURED_DIRS:
+            os.makedirs(folder_path, exist_ok=True)
+            _ENSURED_DIRS.add(folder_path)
 
         filename = (
-            f"history-{APP_START_TIMESTAMP}.log" 
-            if log_file else f"messages-{APP_START_TIMESTAMP}.json"
+            f"history-{APP_START_TIMESTAMP}.log"
+            if log_file else f"messages-{APP_START_TIMESTAMP}.{DATA_FILE_EXT}"
         )
         return os.path.join(folder_path, filename)
 
+    def _pack_record(self, raw: Union[str, bytes], message: FeedMessage) -> bytes:
+        """Serialize a raw message for the output file, including framing."""
+        if DATA_FORMAT == "msgpack":
+            # msgpack is binary and any byte value can appear inside a record
+            # (e.g. the \xdc\x00\x32 array16 header of a 50-level list), so no
+            # delimiter byte is safe; frame each record with a 4-byte
+            # big-endian length prefix instead
+            payload = _MSGPACK_ENCODER.encode(message)
+            return struct.pack(">I", len(payload)) + payload
+        # JSON mode stores the wire bytes as-is, no re-serialization needed
+        if isinstance(raw, str):
+            raw = raw.encode()
+        return raw + b"\n"
+
     def _setup_logger(self) -> logging.Logger:
         """
         Set up a logger for the application.
@@ -84,18 +198,42 @@ class CoinbaseOrderBookClient:
             handler_console.setFormatter(formatter)
             handler_file.setFormatter(formatter)
 
-            # Attach handlers
-            logger.addHandler(handler_console)
-            logger.addHandler(handler_file)
+            # Attach only a queue handler: records are enqueued here and the
+            # listener thread owns the console/file I/O, so a log call in the
+            # recv loop never blocks the event loop on a disk write
+            log_queue: queue.Queue = queue.Queue(-1)
+            logger.addHandler(QueueHandler(log_queue))
+            self._log_listener = QueueListener(log_queue, handler_console, handler_file)
+            self._log_listener.start()
+            atexit.register(self._log_listener.stop)
+
+        # Level is fixed after setup, so cache the checks for the hot path
+        self._log_info = logger.isEnabledFor(logging.INFO)
+        self._log_debug = logger.isEnabledFor(logging.DEBUG)
         return logger
 
-    def _write_to_output_file(self, message: dict):
+    def _write_to_output_file(self, raw: Union[str, bytes], message: FeedMessage):
         """Write a message to the output file in DATA_STORE mode."""
-        if os.getenv("DATA_STORE", "False").lower() == "true" and self.output_file:
+        if self._output_fp is None:
+            return
+        try:
+            self._write_queue.put_nowait(self._pack_record(raw, message))
+        except asyncio.QueueFull:
+            # Backpressure: favour the feed over the data store and drop the record
+            self.logger.warning(f"{self.product_id}: Data-store queue is full, dropping message")
+
+    async def _writer_loop(self) -> None:
+        """Drain the write queue in batches, off the WebSocket hot path."""
+        while True:
+            records = [await self._write_queue.get()]
+            try:
+                while len(records) < WRITE_BATCH_MAX:
+                    records.append(self._write_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                pass
             try:
-                with open(self.output_file, "a") as file:
-                    json.dump(message, file)
-                    file.write("\n")
+                self._output_fp.write(b"".join(records))
+                self._output_fp.flush()
             except Exception as e:
                 self.logger.error(f"Failed to write message to file: {e}")
 
@@ -113,124 +251,86 @@ class CoinbaseOrderBookClient:
             ]
         }
 
-    def _subscriptions_check(self, message) -> None:
-        channels = message.get("channels")
-        if not isinstance(channels, list):
-            raise ValueError(f"{self.product_id}: 'channels' is not a list")
-
-        for channel in channels:
-            if not isinstance(channel, dict):
-                raise ValueError(f"{self.product_id}: Invalid channel format")
-
-            channel_name = channel.get("name")
-            product_ids = channel.get("product_ids")
-
-            if not isinstance(channel_name, str):
-                raise ValueError(f"{self.product_id}: 'name' is missing or not a string in channel")
-
-            if not isinstance(product_ids, list):
-                raise ValueError(f"{self.product_id}: 'product_ids' is missing or not a list in channel")
-
-            if not product_ids:
+    def _subscriptions_check(self, message: SubscriptionsAck) -> None:
+        """Check the business rules the schema cannot express: one channel, our product only."""
+        for channel in message.channels:
+            if not channel.product_ids:
                 raise ValueError(f"{self.product_id}: 'product_ids' is empty in channel")
 
-            if PRODUCT_ID not in product_ids:
+            if PRODUCT_ID not in channel.product_ids:
                 raise ValueError(f"{self.product_id}: '{PRODUCT_ID}' is not in 'product_ids' list")
 
-            if len(product_ids) > 1:
+            if len(channel.product_ids) > 1:
                 raise ValueError(f"{self.product_id}: Trying to subscribe to too many product_ids. Only one product is allowed.")
 
+    @staticmethod
+    def _book_from_levels(levels: List[Tuple[str, str]]) -> SortedDict:
+        """
+        Build a price -> size book from (price, size) rows in one pass.
 
-    def _snapshot_check(self, message):
-    # Check if 'product_id' is a string
-        
-        product_id = message.get("product_id")
-        if not product_id:
-            raise ValueError(f"{self.product_id}: 'product_id' is empty")
-
-        if not isinstance(product_id, str):
-            raise ValueError("'product_id' should be a string")
-
-        if PRODUCT_ID != product_id:
-            raise ValueError(f"{self.product_id}: '{PRODUCT_ID}' shoud be equal")
-
-        # Check if 'bids' is a list and not empty
-        bids = message.get("bids")
-        if not isinstance(bids, list):
-            raise ValueError("'bids' should be a list")
-        if not bids:
-            raise ValueError("'bids' should not be empty")
-        for bid in bids:
-            if not isinstance(bid, list) or len(bid) != 2:
-                raise ValueError("Each bid should be a list of two elements (price, amount)")
-
-        # Check if 'asks' is a list and not empty
-        asks = message.get("asks")
-        if not isinstance(asks, list):
-            raise ValueError("'asks' should be a list")
-        if not asks:
-            raise ValueError("'asks' should not be empty")
-        for ask in asks:
-            if not isinstance(ask, list) or len(ask) != 2:
-                raise ValueError("Each ask should be a list of two elements (price, amount)")
-
-
-    def _update_check(self, message):
-        product_id = message.get("product_id")
-        if not product_id:
-            raise ValueError(f"{self.product_id}: 'product_id' is empty")
-
-        if not isinstance(product_id, str):
-            raise ValueError("'product_id' should be a string")
-
-        if PRODUCT_ID != product_id:
-            raise ValueError(f"{self.product_id}: '{PRODUCT_ID}' shoud be equal")
-
-        # Check if 'changes' is a list and not empty
-        changes = message.get("changes")
-        if not isinstance(changes, list):
-            raise ValueError("'changes' should be a list")
-        if not changes:
-            raise ValueError("'changes' should not be empty")
-        
-        # Check if each change is a list with three elements (side, price, amount)
-        for change in changes:
-            if not isinstance(change, list) or len(change) != 3:
-                raise ValueError("Each change should be a list of three elements (side, price, amount)")
-            # Check if side is either 'buy' or 'sell'
-            side = change[0].lower()
-            if side not in ["buy", "sell"]:
-                raise ValueError("Side must be either 'buy' or 'sell'")            
-                             
-
-    async def process_message(self, message: Dict[str, Any]) -> None:
-        """Processing the message with basic validation"""
-
-        message_type = message.get("type")
-        self._write_to_output_file(message)
+        zip(*levels) transposes the rows into price/size columns so the dict is
+        constructed from two C-level iterators instead of unpacking per row.
+        """
+        if not levels:
+            return SortedDict()
+        prices, sizes = zip(*levels)
+        return SortedDict(zip(map(float, prices), map(float, sizes)))
+
+    def _product_check(self, product_id: str) -> None:
+        if product_id != self.product_id:
+            raise ValueError(f"{self.product_id}: unexpected product_id '{product_id}'")
+
+    async def process_message(self, raw: Union[str, bytes], message: FeedMessage, recalc: bool = True) -> bool:
+        """
+        Process a decoded feed message; structural validation already happened
+        in the decoder. Returns True when the message touched top-of-book; with
+        recalc=False the caller runs _calculations itself after a batch.
+        """
+
+        self._write_to_output_file(raw, message)
+        dirty = False
 
         try:
-            if message_type == "subscriptions":
-                self.logger.info(f"{self.product_id}: Subscriptions ack received")
-                self._subscriptions_check(message)
-
-            elif message_type == "snapshot":                
-                self.logger.info(f"{self.product_id}: Snapshot received")
-                self._snapshot_check(message)
-                self.bids = {price: size for price, size in message.get("bids", [])}
-                self.asks = {price: size for price, size in message.get("asks", [])}
-                self._calculations()
-
-            elif message_type == "l2update":
-                self.logger.info(f"{self.product_id}: L2 update received")
-                changes = message.get("changes", [])
-                for change in changes:
-                    side, price, size = change
-                    if side == "buy":
-                        self.bids[price] = size
-                    elif side == "sell":
-                        self.asks[price] = size
-                self._calculations()
+            if isinstance(message, SubscriptionsAck):
+                self.logger.info("%s: Subscriptions ack received", self.product_id)
+                if not self._subscription_acked:
+                    self._subscriptions_check(message)
+                    self._subscription_acked = True
+
+            elif isinstance(message, Snapshot):
+                self.logger.info("%s: Snapshot received", self.product_id)
+                self._product_check(message.product_id)
+                self.bids = self._book_from_levels(message.bids)
+                self.asks = self._book_from_levels(message.asks)
+                dirty = True
+
+            elif isinstance(message, L2Update):
+                if self._log_info:
+                    self.logger.info("%s: L2 update received", self.product_id)
+                self._product_check(message.product_id)
+                # Map side -> (book, direction, cached best) once per message: a hash
+                # lookup per change instead of an if/elif chain, with the direction
+                # sign folding the bid/ask top-of-book comparisons into one expression
+                books = {
+                    "buy": (self.bids, 1.0, self._best_bid),
+                    "sell": (self.asks, -1.0, self._best_ask),
+                }
+                # Only recompute when a change touches (or beats) the current top-of-book
+                for side, price, size in message.changes:
+                    entry = books.get(side)
+                    if entry is None:
+                        raise ValueError(f"Side must be either 'buy' or 'sell', got '{side}'")
+                    book, direction, best = entry
+                    # Convert each field exactly once at ingest
+                    price_level = float(price)
+                    size_value = float(size)
+                    if size_value == 0.0:
+                        # Zero size means the level was removed (Coinbase convention)
+                        book.pop(price_level, None)
+                        dirty = dirty or price_level == best
+                    else:
+                        book[price_level] = size_value
+                        dirty = dirty or best is None or direction * price_level >= direction * best
 
         except ValueError as e:
             self.logger.error(f"Invalid subscription message: {message}, Error: {str(e)}")
@@ -239,58 +339,50 @@ class CoinbaseOrderBookClient:
             self.logger.error(f"Error handling connection: {e}")
             raise
 
+        if dirty and recalc:
+            self._calculations()
+        return dirty
+
 
     def _calculations(self) -> None:
         """
         Calculate mid-price, max spread, and moving average.
         """
-        highest_bid = max(self.bids, key=float, default=None)
-        lowest_ask = min(self.asks, key=float, default=None)
-
-        if highest_bid and lowest_ask:
-            highest_bid_price = float(highest_bid)
-            lowest_ask_price = float(lowest_ask)
+        if self.bids and self.asks:
+            # Keys are floats kept sorted; peekitem reads top-of-book directly
+            # without materializing a keys view per call
+            highest_bid_price = self.bids.peekitem(-1)[0]
+            lowest_ask_price = self.asks.peekitem(0)[0]
+            self._best_bid = highest_bid_price
+            self._best_ask = lowest_ask_price
             mid_price = (highest_bid_price + lowest_ask_price) / 2
-            self.mid_price_history.append(mid_price)
 
-            if len(self.mid_price_history) > self.moving_average_period:
-                self.mid_price_history.pop(0)
+            # deque with maxlen evicts the oldest entry on append; mirror that in the sum
+            evicted = (
+                self.mid_price_history[0]
+                if len(self.mid_price_history) == self.moving_average_period else 0.0
+            )
+            self.mid_price_history.append(mid_price)
+            self._mid_price_sum += mid_price - evicted
 
-            moving_avg = sum(self.mid_price_history) / len(self.mid_price_history)
+            moving_avg = self._mid_price_sum / len(self.mid_price_history)
             spread = lowest_ask_price - highest_bid_price
             # check both positive and negative differences
             self.max_spread = max(self.max_spread, abs(spread))
 
-            self.logger.debug(f"{self.product_id}: Mid Price History: {self.mid_price_history}")
-            self.logger.info(f"{self.product_id}: Mid Price: {mid_price:.2f}, Moving Average: {moving_avg:.2f}")
-            self.logger.info(f"{self.product_id}: Highest Bid: {highest_bid_price:.2f}, Lowest Ask: {lowest_ask_price:.2f}")
-            self.logger.debug(f"{self.product_id}: Spread: {spread:.2f}")
-            self.logger.info(f"{self.product_id}: Max Spread: {self.max_spread:.2f}")
-
-    async def exponential_backoff(
-        self, coro: Callable[[], Awaitable[Any]], max_retries: int = 5, initial_delay: float = 1.0, factor: float = 2.0
-    ) -> Any:
-        retries = 0
-        delay = initial_delay
-
-        while retries < max_retries:
-            try:
-                return await coro()
-            except Exception as e:
-                retries += 1
-                self.logger.warning(
-                    f"{self.product_id}: Attempt {retries}/{max_retries} failed with error: {e}. Retrying in {delay:.2f} seconds..."
-                )
-                await asyncio.sleep(delay)
-                delay *= factor
-
-        self.logger.error(
-            f"{self.product_id}: All {max_retries} retries failed. Operation could not be completed."
-        )
+            # %-style args defer formatting into the handler path; the cached
+            # level flags skip even that when the level is filtered out
+            if self._log_debug:
+                self.logger.debug("%s: Mid Price History: %s", self.product_id, self.mid_price_history)
+                self.logger.debug("%s: Spread: %.2f", self.product_id, spread)
+            if self._log_info:
+                self.logger.info("%s: Mid Price: %.2f, Moving Average: %.2f", self.product_id, mid_price, moving_avg)
+                self.logger.info("%s: Highest Bid: %.2f, Lowest Ask: %.2f", self.product_id, highest_bid_price, lowest_ask_price)
+                self.logger.info("%s: Max Spread: %.2f", self.product_id, self.max_spread)
 
     async def subscribe(self) -> None:
-        subscription_message = self.create_subscription_message()
-        self.logger.debug(f"Subscription message: {json.dumps(subscription_message)}")
+        self._subscription_acked = False
+        self.logger.debug("Subscription message: %s", self._subscription_bytes)
 
         async with websockets.connect(
             self.url,
@@ -298,33 +390,73 @@ class CoinbaseOrderBookClient:
             ) as websocket:
             self.logger.info(f"{self.product_id}: Connected to WebSocket")
 
-            await self.exponential_backoff(
-                lambda: websocket.send(json.dumps(subscription_message))
-            )
+            # Pre-serialized bytes, which websocket.send accepts directly; a send
+            # failure here means a dead socket, so let run()'s backoff handle it
+            await websocket.send(self._subscription_bytes)
             self.logger.info(f"{self.product_id}: Subscription message sent")
 
+            # A frame fetched at the batch cap is held here and consumed by the
+            # next batch instead of being discarded
+            pending: Optional[bytes] = None
             while True:
-                try:
-                    response = await self.exponential_backoff(websocket.recv)
-                    message = json.loads(response)
-                    await self.process_message(message)
-                except json.JSONDecodeError:
-                    self.logger.error(f"{self.product_id}: Failed to decode message")
-                except (ConnectionClosedOK, ConnectionClosedError):
-                    self.logger.warning(f"{self.product_id}: WebSocket connection closed")
-                    break
+                if pending is not None:
+                    response, pending = pending, None
+                else:
+                    try:
+                        # Happy path: recv directly. Retrying a recv in place is pointless —
+                        # a failed recv means the connection is gone and run() reconnects.
+                        # decode=False keeps text frames as raw bytes: the msgspec decoder
+                        # validates UTF-8 while parsing, so decoding here would scan twice.
+                        response = await websocket.recv(decode=False)
+                    except (ConnectionClosedOK, ConnectionClosedError):
+                        self.logger.warning(f"{self.product_id}: WebSocket connection closed")
+                        break
+
+                # Coalesce bursts: apply every frame that is already (or nearly)
+                # available to the books and recompute analytics once at the end
+                dirty = False
+                for _ in range(COALESCE_MAX_BATCH):
+                    try:
+                        message = _FEED_DECODER.decode(response)
+                        dirty = await self.process_message(response, message, recalc=False) or dirty
+                    except msgspec.DecodeError as e:
+                        self.logger.error(f"{self.product_id}: Failed to decode message: {e}")
+                    try:
+                        response = await asyncio.wait_for(
+                            websocket.recv(decode=False), timeout=COALESCE_WAIT
+                        )
+                    except (asyncio.TimeoutError, ConnectionClosedOK, ConnectionClosedError):
+                        # Nothing buffered (or the connection dropped, which the
+                        # next blocking recv will surface) — flush the batch
+                        break
+                else:
+                    # Cap reached with one frame already fetched but not yet
+                    # processed — carry it into the next batch
+                    pending = response
+                if dirty:
+                    self._calculations()
 
     async def run(self) -> None:
         """
-        Run the WebSocket client with reconnection logic.
+        Run the WebSocket client with reconnection logic and exponential backoff.
         """
+        if self._output_fp is not None:
+            # Hold a reference: the event loop only keeps weak refs to tasks,
+            # so an anonymous writer task could be garbage-collected mid-run
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+        delay = RECONNECT_INITIAL_DELAY
         while True:
             try:
                 await self.subscribe()
+                delay = RECONNECT_INITIAL_DELAY
             except Exception as e:
                 self.logger.error(f"{self.product_id}: Error in subscription: {e}")
-                self.logger.info(f"{self.product_id}: Reconnecting in 5 seconds...")
-                await asyncio.sleep(5)
+            # Sleep with the current delay, then double it for the next round,
+            # so the first retry honors RECONNECT_INITIAL_DELAY
+            self.logger.info("%s: Reconnecting in %.2f seconds...", self.product_id, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
 
 
 async def main() -> None:
@@ -333,4 +465,10 @@ async def main() -> None:
     await client.run()
 
 if __name__ == "__main__":
+    # libuv-based event loop: faster task scheduling for the recv loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1,16 +1,49 @@
 import asyncio
+import atexit
 import json
 import random
 import logging
+import msgspec
+import queue
+import numpy as np
 from websockets import serve
-from typing import Dict, Any, Final
+from typing import Any, Final, List
 import os
 from datetime import datetime
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+# orjson serializes/parses in native code, several times faster than stdlib
+# json on the per-message paths; fall back to stdlib json if not installed
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
 
 
 BASE_LOGS_DIR: Final[str] = "mock_logs"
 BASE_DATA_DIR: Final[str] = "mock_data"
 
+# DATA_STORE is fixed at process start, so read it once instead of per message
+DATA_STORE_ENABLED: Final[bool] = os.getenv("DATA_STORE", "False").lower() == "true"
+
+# Userspace buffer for the kept-open data-store file handle
+OUTPUT_BUFFER_SIZE: Final[int] = 1 << 16
+
+# Records accumulate in a bytearray and hit the file in one write when the
+# buffer passes this size or the periodic flush fires
+OUTPUT_COALESCE_MAX: Final[int] = 128 * 1024
+OUTPUT_FLUSH_INTERVAL: Final[float] = 0.5  # seconds
+
+# Seconds between l2update frames on a subscribed connection
+UPDATE_INTERVAL: Final[float] = 5.0
+
+# History log records buffered in memory before one coalesced file write;
+# anything at ERROR or above flushes immediately
+LOG_BUFFER_RECORDS: Final[int] = 256
+
 # Read the PRODUCT_ID environment variable
 PRODUCT_ID: Final[str] = os.getenv("PRODUCT_ID")
 
@@ -24,15 +57,73 @@ L2UPDATE_COUNT: Final[int] = int(os.getenv("L2UPDATE_COUNT", 50))
 # which port to run the pair specific mock instance
 MOCK_PORT: Final[int] = int(os.getenv("MOCK_PORT", "8765"))
 
+# how many l2updates to merge into one frame per tick; the default of 1 keeps
+# the single-object wire format, >1 sends a JSON array (for throughput tests)
+BATCH_SIZE: Final[int] = int(os.getenv("BATCH_SIZE", "1"))
+
+# permessage-deflate costs zlib CPU on every frame and the small random JSON
+# payloads barely compress, so it is off unless COMPRESSION=deflate is set
+COMPRESSION: Final = os.getenv("COMPRESSION") or None
+
+
+# Integer-cent sampling bounds for generate_update: a single random() multiply-
+# add plus an integer divide replaces the uniform + round pair per cell
+PRICE_LO_CENTS: Final[int] = 30000 * 100
+PRICE_SPAN_CENTS: Final[int] = (50000 - 30000) * 100
+SIZE_LO_CENTS: Final[int] = 10  # 0.1
+SIZE_SPAN_CENTS: Final[int] = 490  # up to 5.0
+
+
+class SubscribeChannel(msgspec.Struct):
+    """One channel entry of a client 'subscribe' request."""
+    name: str
+    product_ids: List[str]
+
+
+class SubscribeRequest(msgspec.Struct):
+    """Subscribe request sent by a client when the connection opens."""
+    type: str
+    channels: List[SubscribeChannel]
+
+
+# Typed decoder: parse + structural validation happen in one native pass, so
+# the Python-level isinstance walk over nested dicts/lists is not needed
+_SUBSCRIBE_DECODER: Final[msgspec.json.Decoder] = msgspec.json.Decoder(SubscribeRequest)
+
 class MockServer:
     def __init__(self, product_id, update_count=50):
         self.product_id = product_id
         self.update_count = update_count
+        # numpy generator for batch sampling instead of per-row random calls
+        self._rng = np.random.default_rng()
 
         self.history_file = self._setup_file(BASE_LOGS_DIR, log_file=True)
-        self.output_file = self._setup_file(BASE_DATA_DIR) if os.getenv("DATA_STORE", "False").lower() == "true" else None
+        self.output_file = self._setup_file(BASE_DATA_DIR) if DATA_STORE_ENABLED else None
         self.logger = self._setup_logger()
 
+        # Keep the output file open for the server's lifetime instead of paying
+        # an open/close syscall pair per record
+        self._out_fh = None
+        self._out_buf = bytearray()
+        self._flush_task = None
+        if self.output_file:
+            self._out_fh = open(self.output_file, "ab", buffering=OUTPUT_BUFFER_SIZE)
+            atexit.register(self._out_fh.close)
+            # atexit runs LIFO, so the buffer is flushed before the close above
+            atexit.register(self._flush_output_buffer)
+
+        # The subscribe_ack and the snapshot are constant for this instance, so
+        # build and serialize them once instead of on every connection
+        self._subscribe_ack = self.generate_subscribe_ack(product_id)
+        self._subscribe_ack_bytes = _dumps(self._subscribe_ack)
+        self._snapshot = self.generate_snapshot(product_id)
+        self._snapshot_bytes = _dumps(self._snapshot)
+
+        # The l2update envelope is invariant too — only 'changes' varies per
+        # tick, so serialization just splices the payload between these bytes
+        self._update_prefix = b'{"type":"l2update","product_id":"' + product_id.encode() + b'","changes":'
+        self._update_suffix = b"}"
+
     def _setup_file(self, base_folder: str, log_file: bool = False) -> str:
         """
         Create a folder structure based on product_id and date, and return the file path.
@@ -46,15 +137,40 @@ class MockServer:
         )
         return os.path.join(folder_path, filename)
 
-    def _write_to_output_file(self, message: dict):
-        """Write a message to the output file in DATA_STORE mode."""
-        if os.getenv("DATA_STORE", "False").lower() == "true" and self.output_file:
-            try:
-                with open(self.output_file, "a") as file:
-                    json.dump(message, file)
-                    file.write("\n")
-            except Exception as e:
-                self.logger.error(f"Failed to write message to file: {e}")
+    def _write_to_output_file(self, message):
+        """Write a message (dict or pre-serialized JSON bytes) to the output file in DATA_STORE mode."""
+        if self._out_fh is None:
+            return
+        try:
+            payload = message if isinstance(message, (bytes, bytearray)) else _dumps(message)
+            self._out_buf += payload + b"\n"
+        except Exception as e:
+            self.logger.error(f"Failed to serialize message: {e}")
+            return
+        if len(self._out_buf) >= OUTPUT_COALESCE_MAX:
+            self._flush_output_buffer()
+
+    def _flush_output_buffer(self):
+        """Write the coalesced records in one go and reset the buffer."""
+        if self._out_fh is None or not self._out_buf:
+            return
+        try:
+            self._out_fh.write(self._out_buf)
+            self._out_fh.flush()
+        except Exception as e:
+            self.logger.error(f"Failed to write message to file: {e}")
+        finally:
+            # Don't hold on to peak capacity after an oversized batch
+            if len(self._out_buf) > OUTPUT_COALESCE_MAX:
+                self._out_buf = bytearray()
+            else:
+                del self._out_buf[:]
+
+    async def _periodic_flush(self):
+        """Flush buffered data-store records on a timer."""
+        while True:
+            await asyncio.sleep(OUTPUT_FLUSH_INTERVAL)
+            self._flush_output_buffer()
 
 
     def _setup_logger(self) -> logging.Logger:
@@ -71,20 +187,34 @@ class MockServer:
         if not logger.handlers:
             # Console handler
             handler_console = logging.StreamHandler()
-            # File handler
-            handler_file = logging.FileHandler(self.history_file)
+            # File handler, opened lazily on the first flushed record
+            handler_file = logging.FileHandler(self.history_file, delay=True)
 
             # Formatter
             formatter = logging.Formatter(f"%(asctime)s - {self.product_id} - %(levelname)s - %(message)s")
             handler_console.setFormatter(formatter)
             handler_file.setFormatter(formatter)
 
-            # Attach handlers
-            logger.addHandler(handler_console)
-            logger.addHandler(handler_file)
+            # Coalesce file records: many log lines per write() instead of one
+            # syscall each; errors flush through immediately
+            handler_memory = MemoryHandler(
+                capacity=LOG_BUFFER_RECORDS, flushLevel=logging.ERROR, target=handler_file
+            )
+
+            # Attach only a queue handler: the listener thread owns the console
+            # and file I/O, so update-loop log calls never block the event loop
+            log_queue = queue.SimpleQueue()
+            logger.addHandler(QueueHandler(log_queue))
+            self._log_listener = QueueListener(log_queue, handler_console, handler_memory)
+            self._log_listener.start()
+            atexit.register(self._log_listener.stop)
+
+        # Level is fixed after setup, so cache the checks for the hot paths
+        self._log_info = logger.isEnabledFor(logging.INFO)
+        self._log_debug = logger.isEnabledFor(logging.DEBUG)
         return logger
 
-    async def generate_subscribe_ack(self, product_id):
+    def generate_subscribe_ack(self, product_id):
         # We emulate the protocol's disucssion with this subscribe_ack
         channels = [{
             "name": "level2_50", 
@@ -98,7 +228,7 @@ class MockServer:
         }
         return subscribe_ack
 
-    async def generate_snapshot(self, product_id):
+    def generate_snapshot(self, product_id):
         """Generate a snapshot with 50 bids and asks for the given product_id."""
         snapshot = {
             "type": "snapshot",
@@ -110,82 +240,75 @@ class MockServer:
 
     # Sort bids in descending order and asks in ascending order to guarantee that the highest bid is lower than the lowest ask
     def generate_level2(self, is_bid=True):
-        """Generate random bid/ask data."""
-        level2 = []
-        for _ in range(self.update_count):
-            price = round(
-                random.uniform(30000, 42000) if is_bid else random.uniform(41000, 50000), 2
+        """Generate random bid/ask data, sampled in one vectorized batch."""
+        rng = self._rng
+        n = self.update_count
+        low, high = (30000, 42000) if is_bid else (41000, 50000)
+        # Sort while the prices are still floats — sorting the stringified rows
+        # re-parsed every key through a Python lambda
+        prices = np.sort(rng.uniform(low, high, n))
+        if is_bid:
+            prices = prices[::-1]
+        sizes = rng.uniform(0.1, 5, n)
+
+        # Vectorized '%.2f' rendering rounds and stringifies every cell in one
+        # C call instead of a round + str pair per cell
+        price_strs = np.char.mod("%.2f", prices).tolist()
+        size_strs = np.char.mod("%.2f", sizes).tolist()
+
+        return [list(pair) for pair in zip(price_strs, size_strs)]
+
+    def generate_update(self):
+        """Generate a serialized l2update; only the changes payload varies per tick."""
+        # Bind the per-row lookups to locals: the comprehension then runs on
+        # LOAD_FAST instead of global/attribute lookups per iteration
+        rand = random.random
+        price_span, price_lo = PRICE_SPAN_CENTS, PRICE_LO_CENTS
+        size_span, size_lo = SIZE_SPAN_CENTS, SIZE_LO_CENTS
+
+        # One C-level sampling call for all sides instead of a choice per row;
+        # the tokens already carry the row's JSON framing
+        sides = random.choices((b'["buy","', b'["sell","'), k=self.update_count)
+
+        # Splice the rows straight into the frame: no intermediate changes
+        # list and no dumps() pass over it. %.2f renders through the C
+        # fixed-point path in the canonical two-decimal form ("400.10")
+        buf = bytearray(self._update_prefix)
+        buf += b"["
+        first = True
+        for side in sides:
+            if first:
+                first = False
+            else:
+                buf += b","
+            buf += side
+            buf += b'%.2f","%.2f"]' % (
+                int(rand() * price_span + price_lo) / 100,
+                int(rand() * size_span + size_lo) / 100,
             )
-            size = round(random.uniform(0.1, 5), 2)
-            level2.append([str(price), str(size)])
-        level2.sort(key=lambda x: float(x[0]), reverse=is_bid)
-        return level2
-
-    async def generate_update(self):
-        """Generate random updates for bids/asks."""
-        update = {
-            "type": "l2update",
-            "product_id": self.product_id,
-            "changes": [
-                [
-                    random.choice(["buy", "sell"]),
-                    str(round(random.uniform(30000, 50000), 2)),
-                    str(round(random.uniform(0.1, 5), 2))
-                ]
-                for _ in range(self.update_count)
-            ]
-        }
-        return update
+        buf += b"]"
+        buf += self._update_suffix
+        return bytes(buf)
 
-    async def process_subscription_message(self, message: Dict[str, Any]) -> bool:
+    async def process_subscription_message(self, message: SubscribeRequest) -> bool:
         """
-        Process incoming messages from the WebSocket.
+        Check the business rules of an already-decoded subscribe request; the
+        structural validation happened in the typed decoder.
         """
-        message_type = message.get("type")
-
-        # Step 1: Check if type exists and equals "subscribe"
-        if message_type != "subscribe":
-            self.logger.warning(f"{self.product_id}: Unexpected message type: {message_type}")
-            return False
-        
-        # Step 2: Validate the 'channels' field
-        channels = message.get("channels")
-        if not isinstance(channels, list):
-            self.logger.warning(f"{self.product_id}: 'channels' is not a list")
+        if message.type != "subscribe":
+            self.logger.warning(f"{self.product_id}: Unexpected message type: {message.type}")
             return False
 
-        # Step 3: Validate each channel in the 'channels' list
-        for channel in channels:
-            # Ensure the channel has 'name' and 'product_ids'
-            if not isinstance(channel, dict):
-                self.logger.warning(f"{self.product_id}: Invalid channel format")
-                return False
-
-            channel_name = channel.get("name")
-            product_ids = channel.get("product_ids")
-
-            # Check that 'name' is present and is a string
-            if not isinstance(channel_name, str):
-                self.logger.warning(f"{self.product_id}: 'name' is missing or not a string in channel")
-                return False
+        for channel in message.channels:
+            product_ids = channel.product_ids
 
-            # Check that 'product_ids' is present and is a list
-            if not isinstance(product_ids, list):
-                self.logger.warning(f"{self.product_id}: 'product_ids' is missing or not a list in channel")
-                return False
-
-            # Check if 'product_ids' contains at least one element
-            if not product_ids:
-                self.logger.warning(f"{self.product_id}: 'product_ids' is empty in channel")
-                return False
-            
-            if PRODUCT_ID not in product_ids:
-                self.logger.warning(f"{self.product_id}: is not in 'product_ids' list")
-                return False
-
-            if len(product_ids)>1:
-                self.logger.warning(f"{self.product_id}: trying to subscribe to too many product_ids! \
-                                    The application is prepared to allow only one type of Coinbase subscription in this instance")
+            # The empty / wrong-product / too-many cases collapse into one
+            # check: exactly one entry, and it must be our product
+            if len(product_ids) != 1 or product_ids[0] != PRODUCT_ID:
+                self.logger.warning(
+                    "%s: 'product_ids' must contain exactly this product, got %s. "
+                    "The application is prepared to allow only one type of Coinbase "
+                    "subscription in this instance", self.product_id, product_ids)
                 return False
 
         # At this point, the message structure is valid
@@ -199,36 +322,58 @@ class MockServer:
         
         try:
 
-            self.logger.debug(f"Request headers: {websocket}")
+            # %-style args defer formatting (repr(websocket) is expensive) until
+            # a handler actually wants the record
+            self.logger.debug("Request headers: %s", websocket)
 
             # Await the subscription request
             message = await websocket.recv()
-            self.logger.debug(f"Received message: {message} from client {websocket.remote_address[0]}")
-            message_data = json.loads(message)
+            if self._log_debug:
+                self.logger.debug("Received message: %s from client %s", message, websocket.remote_address[0])
+            try:
+                message_data = _SUBSCRIBE_DECODER.decode(message)
+                subscribed = await self.process_subscription_message(message_data)
+            except msgspec.DecodeError as e:
+                self.logger.warning(f"{self.product_id}: Malformed subscribe request: {e}")
+                subscribed = False
 
-            if await self.process_subscription_message(message_data):
+            if subscribed:
                 self.logger.info(f"Received subscription for product: {PRODUCT_ID}")
 
-                # send subscribe_ack
-                subscribe_ack = await self.generate_subscribe_ack(PRODUCT_ID)
-                self._write_to_output_file(subscribe_ack)
+                # send subscribe_ack (pre-serialized at init)
+                self._write_to_output_file(self._subscribe_ack)
                 self.logger.info(f"Sending subscribe_ack for {PRODUCT_ID}")
+                await websocket.send(self._subscribe_ack_bytes)
 
-                await websocket.send(json.dumps(subscribe_ack))
-
-                # Send snapshot
-                snapshot = await self.generate_snapshot(PRODUCT_ID)
-                self._write_to_output_file(snapshot)
+                # Send snapshot (pre-serialized at init)
+                self._write_to_output_file(self._snapshot)
                 self.logger.info(f"Sending snapshot for {PRODUCT_ID}")
+                await websocket.send(self._snapshot_bytes)
 
 
-                # Send updates periodically
+                # Send updates periodically, paced against a monotonic deadline
+                # so generate/send time does not drift the cadence
+                loop = asyncio.get_running_loop()
+                next_tick = loop.time()
                 while True:
-                    update = await self.generate_update()
+                    if BATCH_SIZE > 1:
+                        # Merge several updates into one frame to amortize the
+                        # per-send framing overhead in throughput runs
+                        update = b"[" + b",".join(
+                            self.generate_update() for _ in range(BATCH_SIZE)
+                        ) + b"]"
+                    else:
+                        update = self.generate_update()
                     self._write_to_output_file(update)
-                    self.logger.info(f"Sending update for {PRODUCT_ID}")
-                    await websocket.send(json.dumps(update))
-                    await asyncio.sleep(5)  # Wait 5 seconds before the next update
+                    if self._log_info:
+                        self.logger.info("Sending update for %s", PRODUCT_ID)
+                    await websocket.send(update)
+                    next_tick += UPDATE_INTERVAL
+                    if next_tick < loop.time() - UPDATE_INTERVAL:
+                        # More than a full interval behind (stall, slow client):
+                        # re-anchor rather than burst to catch up
+                        next_tick = loop.time()
+                    await asyncio.sleep(max(0.0, next_tick - loop.time()))
             else:
                 self.logger.error(f"Invalid subscription message: {message} from client {websocket.remote_address[0]}")
         except Exception as e:
@@ -241,9 +386,19 @@ class MockServer:
     async def start_server(self, port=8765):
         """Start the WebSocket server."""
         self.logger.info(f"Starting mock server on port {port}")
-        async with serve(self.handle_connection, "0.0.0.0", port):
+        if self._out_fh is not None:
+            # Hold a reference: the event loop only keeps weak refs to tasks,
+            # so an anonymous flush task could be garbage-collected mid-run
+            self._flush_task = asyncio.create_task(self._periodic_flush())
+        async with serve(self.handle_connection, "0.0.0.0", port, compression=COMPRESSION):
             await asyncio.get_running_loop().create_future()  # Run server until interrupted
 
 if __name__ == "__main__":
+    # libuv-based event loop: cheaper per-await overhead for the send loops
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     mock_server = MockServer(product_id=PRODUCT_ID, update_count=L2UPDATE_COUNT)
     asyncio.run(mock_server.start_server(port=MOCK_PORT))